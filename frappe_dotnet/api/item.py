@@ -5,11 +5,22 @@ Handles item creation with tax templates and tax categories
 
 import frappe
 from frappe import _
+from frappe.query_builder.terms import ValueWrapper
 from frappe.utils import cstr
 import json
 
+try:
+	# orjson is several times faster than the stdlib parser on large payloads
+	from orjson import loads as json_loads
+except ImportError:
+	from json import loads as json_loads
 
-@frappe.whitelist(allow_guest=False)
+
+# Largest batch accepted by create_items_bulk, to keep a request within the worker timeout
+MAX_BULK_ITEMS = 100
+
+
+@frappe.whitelist(allow_guest=False, methods=["POST"])
 def create_item(**kwargs):
 	"""
 	Create an Item with tax templates and tax categories
@@ -39,10 +50,82 @@ def create_item(**kwargs):
 	- item_code: Created item code
 	- item_url: URL to view item
 	"""
-	try:
-		# Validate API key authentication
-		_validate_api_auth()
+	return _create_item(kwargs)
+
+
+@frappe.whitelist(allow_guest=False, methods=["POST"])
+def create_items_bulk(items):
+	"""
+	Create several Items in one request
+
+	Parameters:
+	- items: List of up to 100 items, each accepting the same fields as create_item
+
+	All-or-nothing: if any item fails, no items are created.
+
+	Returns:
+	- success: True if every item was created
+	- message: Summary of the outcome
+	- results: One response per item, in the same order as items. On failure the
+	  failed item carries its create_item error and every other entry reports
+	  that it was not created.
+	"""
+	if isinstance(items, str):
+		try:
+			items = json_loads(items)
+		except json.JSONDecodeError:
+			return _error_response(_("Invalid items data format. Expected JSON array."))
+
+	if not isinstance(items, list):
+		return _error_response(_("Invalid items data format. Expected JSON array."))
+
+	if len(items) > MAX_BULK_ITEMS:
+		return _error_response(
+			_("Too many items: {0} sent, at most {1} per request").format(len(items), MAX_BULK_ITEMS)
+		)
+
+	results = []
+	for idx, item_data in enumerate(items):
+		# Collect this item's messages on their own, so a failure reports only its own
+		previous_messages = frappe.local.message_log
+		frappe.local.message_log = []
 
+		if isinstance(item_data, dict):
+			# A failure here has already rolled back the whole request, earlier items included
+			result = _create_item(item_data, notify=False)
+		else:
+			frappe.db.rollback()
+			result = _error_response(_("Invalid item data at index {0}. Expected JSON object.").format(idx))
+
+		if not result.get("success"):
+			# Messages from earlier records are dropped, as those records were rolled back
+			not_created = _error_response(
+				_("Not created because the item at index {0} failed").format(idx)
+			)
+			return {
+				"success": False,
+				"message": _("Item at index {0} failed, no items were created: {1}").format(
+					idx, result.get("message")
+				),
+				"results": [not_created] * idx + [result] + [not_created] * (len(items) - idx - 1)
+			}
+
+		frappe.local.message_log = previous_messages + frappe.local.message_log
+		results.append(result)
+
+	return {
+		"success": True,
+		"message": _("{0} items created").format(len(results)),
+		"results": results
+	}
+
+
+def _create_item(kwargs, notify=True):
+	"""Create a single Item and return the API response
+
+	Errors roll back the whole request. notify=False skips the per-item alert, for bulk calls.
+	"""
+	try:
 		# Parse arguments
 		data = _parse_request_data(kwargs)
 
@@ -50,10 +133,9 @@ def create_item(**kwargs):
 		_validate_required_fields(data)
 
 		# Create item
-		item = _create_item_doc(data)
+		item = _create_item_doc(data, notify)
 
-		# Commit the transaction
-		frappe.db.commit()
+		# Transaction is committed by Frappe at the end of the POST request
 
 		return {
 			"success": True,
@@ -78,12 +160,6 @@ def create_item(**kwargs):
 		return _error_response(_("Failed to create item: {0}").format(str(e)))
 
 
-def _validate_api_auth():
-	"""Validate API key authentication"""
-	if frappe.session.user == "Guest":
-		frappe.throw(_("Authentication required. Please provide valid API credentials."), frappe.AuthenticationError)
-
-
 def _parse_request_data(kwargs):
 	"""Parse and normalize request data"""
 	data = frappe._dict(kwargs)
@@ -91,13 +167,13 @@ def _parse_request_data(kwargs):
 	# Parse JSON strings if needed
 	if isinstance(data.get("tax_templates"), str):
 		try:
-			data.tax_templates = json.loads(data.tax_templates)
+			data.tax_templates = json_loads(data.tax_templates)
 		except json.JSONDecodeError:
 			frappe.throw(_("Invalid tax_templates data format. Expected JSON array."))
 
 	if isinstance(data.get("item_defaults"), str):
 		try:
-			data.item_defaults = json.loads(data.item_defaults)
+			data.item_defaults = json_loads(data.item_defaults)
 		except json.JSONDecodeError:
 			frappe.throw(_("Invalid item_defaults data format. Expected JSON array."))
 
@@ -115,22 +191,43 @@ def _validate_required_fields(data):
 			frappe.MandatoryError
 		)
 
+	# Check item_group and item_code in a single round-trip
+	existing = _get_existing_records(data.item_group, data.item_code)
+
 	# Validate item_group exists
-	if not frappe.db.exists("Item Group", data.item_group):
+	if "item_group" not in existing:
 		frappe.throw(
 			_("Item Group '{0}' does not exist. Please check the item group.").format(data.item_group),
 			frappe.DoesNotExistError
 		)
 
 	# Validate item_code doesn't already exist
-	if frappe.db.exists("Item", data.item_code):
+	if "item" in existing:
 		frappe.throw(
 			_("Item code '{0}' already exists").format(data.item_code),
 			frappe.DuplicateEntryError
 		)
 
 
-def _create_item_doc(data):
+def _get_existing_records(item_group, item_code):
+	"""Return which of the item group / item code exist, as a set of "item_group" / "item" keys"""
+	item_group_table = frappe.qb.DocType("Item Group")
+	item_table = frappe.qb.DocType("Item")
+
+	query = (
+		frappe.qb.from_(item_group_table)
+		.select(ValueWrapper("item_group"))
+		.where(item_group_table.name == item_group)
+	).union_all(
+		frappe.qb.from_(item_table)
+		.select(ValueWrapper("item"))
+		.where(item_table.name == item_code)
+	)
+
+	return {row[0] for row in query.run()}
+
+
+def _create_item_doc(data, notify=True):
 	"""Create the item document"""
 	try:
 		item = frappe.get_doc({
@@ -166,11 +263,12 @@ def _create_item_doc(data):
 		# Insert item
 		item.insert(ignore_permissions=False)
 
-		frappe.msgprint(
-			_("Item '{0}' created successfully").format(data.item_code),
-			indicator="green",
-			alert=True
-		)
+		if notify:
+			frappe.msgprint(
+				_("Item '{0}' created successfully").format(data.item_code),
+				indicator="green",
+				alert=True
+			)
 
 		return item
 
@@ -197,29 +295,31 @@ def _create_item_doc(data):
 
 def _add_tax_templates(item, tax_templates):
 	"""Add multiple tax templates to item"""
-	for template in tax_templates:
-		if not isinstance(template, dict):
-			continue
+	tax_templates = [template for template in tax_templates if isinstance(template, dict)]
+
+	# Fetch existing templates and categories in one query per doctype
+	existing_templates = _get_existing_names(
+		"Item Tax Template", {t.get("item_tax_template") for t in tax_templates}
+	)
+	existing_categories = _get_existing_names(
+		"Tax Category", {t.get("tax_category") for t in tax_templates}
+	)
+
+	skipped_templates = []
+	missing_categories = []
 
+	for template in tax_templates:
 		item_tax_template = template.get("item_tax_template")
 		tax_category = template.get("tax_category")
 
 		# Validate tax template exists
-		if item_tax_template and not frappe.db.exists("Item Tax Template", item_tax_template):
-			frappe.msgprint(
-				_("Item Tax Template '{0}' does not exist. Skipping.").format(item_tax_template),
-				indicator="orange",
-				alert=True
-			)
+		if item_tax_template and item_tax_template not in existing_templates:
+			skipped_templates.append(item_tax_template)
 			continue
 
 		# Validate tax category exists
-		if tax_category and not frappe.db.exists("Tax Category", tax_category):
-			frappe.msgprint(
-				_("Tax Category '{0}' does not exist. Skipping.").format(tax_category),
-				indicator="orange",
-				alert=True
-			)
+		if tax_category and tax_category not in existing_categories:
+			missing_categories.append(tax_category)
 			continue
 
 		item.append("taxes", {
@@ -230,6 +330,17 @@ def _add_tax_templates(item, tax_templates):
 			"maximum_net_rate": template.get("maximum_net_rate", 0)
 		})
 
+	# Report all skipped rows in one message
+	if skipped_templates or missing_categories:
+		frappe.msgprint(
+			_("Skipped {0} tax template row(s). Missing Item Tax Templates: {1}. Missing Tax Categories: {2}").format(
+				len(skipped_templates) + len(missing_categories),
+				", ".join(skipped_templates) or _("None"),
+				", ".join(missing_categories) or _("None")
+			),
+			indicator="orange"
+		)
+
 
 def _add_single_tax_template(item, item_tax_template, tax_category=None):
 	"""Add a single tax template to item"""
@@ -259,19 +370,17 @@ def _add_single_tax_template(item, item_tax_template, tax_category=None):
 
 def _add_item_defaults(item, item_defaults):
 	"""Add multiple company defaults to item"""
-	for default in item_defaults:
-		if not isinstance(default, dict):
-			continue
+	item_defaults = [default for default in item_defaults if isinstance(default, dict)]
+	existing_companies = _get_existing_names("Company", {d.get("company") for d in item_defaults})
 
+	skipped_companies = []
+
+	for default in item_defaults:
 		company = default.get("company")
 
 		# Validate company exists
-		if not company or not frappe.db.exists("Company", company):
-			frappe.msgprint(
-				_("Company '{0}' does not exist. Skipping.").format(company),
-				indicator="orange",
-				alert=True
-			)
+		if not company or company not in existing_companies:
+			skipped_companies.append(cstr(company))
 			continue
 
 		item.append("item_defaults", {
@@ -284,6 +393,15 @@ def _add_item_defaults(item, item_defaults):
 			"income_account": default.get("income_account")
 		})
 
+	# Report all skipped rows in one message
+	if skipped_companies:
+		frappe.msgprint(
+			_("Skipped {0} item default row(s) for missing companies: {1}").format(
+				len(skipped_companies), ", ".join(skipped_companies)
+			),
+			indicator="orange"
+		)
+
 
 def _add_single_item_default(item, data):
 	"""Add a single company default to item"""
@@ -309,6 +427,15 @@ def _add_single_item_default(item, data):
 	})
 
 
+def _get_existing_names(doctype, names):
+	"""Return the subset of names that exist for the doctype, using a single query"""
+	names = [name for name in names if name]
+	if not names:
+		return set()
+
+	return set(frappe.get_all(doctype, filters={"name": ("in", names)}, pluck="name"))
+
+
 def _error_response(message):
 	"""Return standardized error response"""
 	return {
@@ -331,18 +458,16 @@ def get_tax_templates(company=None):
 	- tax_templates: List of available tax templates
 	"""
 	try:
-		_validate_api_auth()
-
-		filters = {}
+		template = frappe.qb.DocType("Item Tax Template")
+		query = (
+			frappe.qb.from_(template)
+			.select(template.name, template.title, template.company)
+			.orderby(template.name)
+		)
 		if company:
-			filters["company"] = company
+			query = query.where(template.company == company)
 
-		templates = frappe.get_all(
-			"Item Tax Template",
-			filters=filters,
-			fields=["name", "title", "company"],
-			order_by="name"
-		)
+		templates = query.run(as_dict=True)
 
 		return {
 			"success": True,
@@ -363,13 +488,13 @@ def get_tax_categories():
 	- tax_categories: List of available tax categories
 	"""
 	try:
-		_validate_api_auth()
-
-		categories = frappe.get_all(
-			"Tax Category",
-			fields=["name", "title", "disabled"],
-			filters={"disabled": 0},
-			order_by="name"
+		category = frappe.qb.DocType("Tax Category")
+		categories = (
+			frappe.qb.from_(category)
+			.select(category.name, category.title, category.disabled)
+			.where(category.disabled == 0)
+			.orderby(category.name)
+			.run(as_dict=True)
 		)
 
 		return {
@@ -391,12 +516,12 @@ def get_item_groups():
 	- item_groups: List of available item groups
 	"""
 	try:
-		_validate_api_auth()
-
-		groups = frappe.get_all(
-			"Item Group",
-			fields=["name", "parent_item_group", "is_group"],
-			order_by="name"
+		group = frappe.qb.DocType("Item Group")
+		groups = (
+			frappe.qb.from_(group)
+			.select(group.name, group.parent_item_group, group.is_group)
+			.orderby(group.name)
+			.run(as_dict=True)
 		)
 
 		return {
@@ -5,11 +5,50 @@ Handles invoice creation, customer management, and QR code updates
 
 import frappe
 from frappe import _
-from frappe.utils import nowdate, flt
+from frappe.query_builder import Order
+from frappe.utils import cstr, nowdate, flt
+from frappe.utils.caching import request_cache
 import json
-
-
-@frappe.whitelist(allow_guest=False)
+import re
+
+try:
+	# orjson is several times faster than the stdlib parser on large payloads
+	from orjson import loads as json_loads
+except ImportError:
+	from json import loads as json_loads
+
+
+# Largest batch accepted by create_sales_invoices_bulk, to keep a request within the worker timeout
+MAX_BULK_INVOICES = 50
+
+
+# Map ZATCA tax codes to Item Tax Template search patterns and rates
+TAX_CODE_MAPPING = {
+	# Standard Rate 15%
+	"S": {"patterns": ["vat 15", "15%", "15 -", "standard"], "rate": 15},
+	"01": {"patterns": ["vat 15", "15%", "15 -", "standard"], "rate": 15},
+	"05": {"patterns": ["vat 15", "15%", "15 -", "standard"], "rate": 15},
+	"1": {"patterns": ["vat 15", "15%", "15 -", "standard"], "rate": 15},  # Simple format
+	# Zero Rated 0%
+	"Z": {"patterns": ["vat 0", "0%", "0 -", "zero"], "rate": 0},
+	"02": {"patterns": ["vat 0", "0%", "0 -", "zero"], "rate": 0},
+	"2": {"patterns": ["vat 0", "0%", "0 -", "zero"], "rate": 0},  # Simple format
+	# Exempt
+	"E": {"patterns": ["exempt", "0"], "rate": 0},
+	"03": {"patterns": ["exempt", "0"], "rate": 0},
+	# Out of Scope
+	"O": {"patterns": ["out of scope", "oos", "0"], "rate": 0},
+	"04": {"patterns": ["out of scope", "oos", "0"], "rate": 0},
+}
+
+# One precompiled regex per tax code, matching any of its patterns
+TAX_CODE_PATTERNS = {
+	tax_code: re.compile("|".join(re.escape(pattern) for pattern in mapping["patterns"]))
+	for tax_code, mapping in TAX_CODE_MAPPING.items()
+}
+
+
+@frappe.whitelist(allow_guest=False, methods=["POST"])
 def create_sales_invoice(**kwargs):
 	"""
 	Create a Sales Invoice with automatic customer and item creation if needed
@@ -71,30 +110,110 @@ def create_sales_invoice(**kwargs):
 	- invoice_name: Created invoice name
 	- invoice_url: URL to view invoice
 	- status: Invoice status (Draft/Submitted)
+	- customer_created: Whether a new customer was created
+	- address_created: Whether a billing address was created for the new customer
+	- items_auto_created: Item codes that were created automatically
 	- error_details: Detailed error information (only on failure)
+
+	Per-step messages (customer/address/item creation) are only added to the response's
+	server messages when "sales_invoice_api_verbose" is set in site config.
+	"""
+	return _create_sales_invoice(kwargs)
+
+
+@frappe.whitelist(allow_guest=False, methods=["POST"])
+def create_sales_invoices_bulk(invoices):
+	"""
+	Create several Sales Invoices in one request
+
+	Parameters:
+	- invoices: List of up to 50 invoices, each accepting the same fields as create_sales_invoice
+
+	All-or-nothing: if any invoice fails, no invoices are created.
+
+	Returns:
+	- success: True if every invoice was created
+	- message: Summary of the outcome
+	- results: One response per invoice, in the same order as invoices. On failure the
+	  failed invoice carries its create_sales_invoice error and every other entry reports
+	  that it was not created.
+	"""
+	if isinstance(invoices, str):
+		try:
+			invoices = json_loads(invoices)
+		except json.JSONDecodeError:
+			return _error_response(_("Invalid invoices data format. Expected JSON array."))
+
+	if not isinstance(invoices, list):
+		return _error_response(_("Invalid invoices data format. Expected JSON array."))
+
+	if len(invoices) > MAX_BULK_INVOICES:
+		return _error_response(
+			_("Too many invoices: {0} sent, at most {1} per request").format(len(invoices), MAX_BULK_INVOICES)
+		)
+
+	results = []
+	for idx, invoice_data in enumerate(invoices):
+		# Collect this invoice's messages on their own, so a failure reports only its own
+		previous_messages = frappe.local.message_log
+		frappe.local.message_log = []
+
+		if isinstance(invoice_data, dict):
+			# A failure here has already rolled back the whole request, earlier invoices included
+			result = _create_sales_invoice(invoice_data, use_request_body=False)
+		else:
+			frappe.db.rollback()
+			result = _error_response(_("Invalid invoice data at index {0}. Expected JSON object.").format(idx))
+
+		if not result.get("success"):
+			# Messages from earlier records are dropped, as those records were rolled back
+			not_created = _error_response(
+				_("Not created because the invoice at index {0} failed").format(idx)
+			)
+			return {
+				"success": False,
+				"message": _("Invoice at index {0} failed, no invoices were created: {1}").format(
+					idx, result.get("message")
+				),
+				"results": [not_created] * idx + [result] + [not_created] * (len(invoices) - idx - 1)
+			}
+
+		frappe.local.message_log = previous_messages + frappe.local.message_log
+		results.append(result)
+
+	return {
+		"success": True,
+		"message": _("{0} invoices created").format(len(results)),
+		"results": results
+	}
+
+
+def _create_sales_invoice(kwargs, use_request_body=True):
+	"""Create a single Sales Invoice and return the API response
+
+	Errors roll back the whole request.
 	"""
 	try:
-		# Validate API key authentication
-		_validate_api_auth()
+		# Collects what was created along the way, returned in the response
+		summary = {"customer_created": False, "address_created": False, "items_auto_created": []}
 
 		# Parse arguments
-		data = _parse_request_data(kwargs)
+		data = _parse_request_data(kwargs, use_request_body)
 
 		# Validate required fields
 		_validate_required_fields(data)
 
 		# Get or create customer
-		customer = _get_or_create_customer(data)
+		customer = _get_or_create_customer(data, summary)
 
 		# Create sales invoice
-		invoice = _create_invoice(data, customer)
+		invoice = _create_invoice(data, customer, summary)
 
 		# Update QR code if provided
 		if data.get("qr_code"):
 			_update_qr_code(invoice.name, data.get("qr_code"))
 
-		# Commit the transaction
-		frappe.db.commit()
+		# Transaction is committed by Frappe at the end of the POST request
 
 		# Get ZATCA status from Sales Invoice Additional Fields (if exists)
 		zatca_info = _get_zatca_info(invoice.name)
@@ -112,7 +231,10 @@ def create_sales_invoice(**kwargs):
 			"posting_date": str(invoice.posting_date),
 			"zatca_status": zatca_info.get("integration_status"),
 			"zatca_uuid": zatca_info.get("uuid"),
-			"zatca_qr_code": zatca_info.get("qr_code")
+			"zatca_qr_code": zatca_info.get("qr_code"),
+			"customer_created": summary["customer_created"],
+			"address_created": summary["address_created"],
+			"items_auto_created": summary["items_auto_created"]
 		}
 
 	except frappe.ValidationError as e:
@@ -145,18 +267,48 @@ def create_sales_invoice(**kwargs):
 		)
 	except Exception as e:
 		frappe.db.rollback()
-		frappe.log_error(message=frappe.get_traceback(), title="Sales Invoice Creation Failed")
+		_log_error(message=frappe.get_traceback(), title="Sales Invoice Creation Failed")
 		return _error_response(
 			_("Failed to create invoice: {0}").format(str(e)),
 			error_type="UnexpectedError",
 			error_details=_get_error_details(e)
 		)
+	finally:
+		# Written after any rollback above, so failure diagnostics are kept
+		_flush_error_logs()
+
+
+def _msgprint(message, **kwargs):
+	"""Show a per-step progress message, only when verbose messages are enabled in site config
+
+	API clients get the same information from the summary fields of the response.
+	"""
+	if frappe.conf.get("sales_invoice_api_verbose"):
+		frappe.msgprint(message, **kwargs)
+
+
+def _log_error(message, title):
+	"""Collect an Error Log entry for the current request
+
+	Entries are written together by _flush_error_logs once the invoice flow has
+	finished, instead of one Error Log insert per call that a rollback would discard.
+	"""
+	frappe.flags.setdefault("sales_invoice_api_errors", []).append((title, message))
 
 
-def _validate_api_auth():
-	"""Validate API key authentication"""
-	if frappe.session.user == "Guest":
-		frappe.throw(_("Authentication required. Please provide valid API credentials."), frappe.AuthenticationError)
+def _flush_error_logs():
+	"""Write all collected Error Log entries as a single Error Log"""
+	errors = frappe.flags.pop("sales_invoice_api_errors", None)
+	if not errors:
+		return
+
+	if len(errors) == 1:
+		title, message = errors[0]
+	else:
+		title = f"Sales Invoice API - {len(errors)} Errors"
+		message = "\n\n".join(f"{error_title}:\n{error_message}" for error_title, error_message in errors)
+
+	frappe.log_error(message=message, title=title)
 
 
 def _get_zatca_info(invoice_name):
@@ -185,14 +337,18 @@ def _get_zatca_info(invoice_name):
 		return {"integration_status": None, "uuid": None, "qr_code": None}
 
 
-def _parse_request_data(kwargs):
-	"""Parse and normalize request data"""
+def _parse_request_data(kwargs, use_request_body=True):
+	"""Parse and normalize request data
+
+	use_request_body is False for invoices taken from a bulk request, whose body holds the whole batch.
+	"""
 	data = frappe._dict(kwargs)
+	debug = frappe.conf.get("sales_invoice_api_debug")
 
 	# Always try to get data from request JSON body
 	# Frappe doesn't always pass nested arrays through kwargs properly
 	request_json = None
-	if frappe.request:
+	if use_request_body and frappe.request:
 		try:
 			# Try using Flask's get_json() first (handles content-type and encoding)
 			if hasattr(frappe.request, 'get_json'):
@@ -200,17 +356,14 @@ def _parse_request_data(kwargs):
 
 			# Fallback to manual parsing if get_json didn't work
 			if not request_json and frappe.request.data:
-				raw_data = frappe.request.data
-				# Handle bytes
-				if isinstance(raw_data, bytes):
-					raw_data = raw_data.decode('utf-8')
-				if raw_data:
-					request_json = json.loads(raw_data)
+				# Bytes are parsed directly, without decoding to str first
+				request_json = json_loads(frappe.request.data)
 		except (json.JSONDecodeError, AttributeError, UnicodeDecodeError) as e:
-			frappe.log_error(
-				message=f"Failed to parse request JSON: {str(e)}\nRaw data type: {type(frappe.request.data)}\nRaw data: {frappe.request.data}",
-				title="Sales Invoice API - JSON Parse Error"
-			)
+			# Only include the (potentially large) raw body when debugging is enabled
+			message = f"Failed to parse request JSON: {str(e)}\nRaw data type: {type(frappe.request.data)}"
+			if debug:
+				message += f"\nRaw data: {frappe.request.data}"
+			frappe.logger("sales_invoice_api").warning(message)
 
 	# Merge request JSON with data
 	if request_json and isinstance(request_json, dict):
@@ -219,11 +372,11 @@ def _parse_request_data(kwargs):
 			if key == "items" or key not in data or data.get(key) is None:
 				data[key] = value
 
-	# Debug log to help troubleshoot data format issues
-	frappe.log_error(
-		message=f"Received kwargs keys: {list(kwargs.keys())}\nItems type: {type(data.get('items'))}\nItems value: {data.get('items')}\nRequest JSON: {request_json}",
-		title="Sales Invoice API - Request Data Debug"
-	)
+	# Debug log to help troubleshoot data format issues (file log only, never Error Log)
+	if debug:
+		frappe.logger("sales_invoice_api").debug(
+			f"Received kwargs keys: {list(kwargs.keys())}\nItems type: {type(data.get('items'))}\nItems value: {data.get('items')}\nRequest JSON: {request_json}"
+		)
 
 	# Handle items parsing - could come in various formats
 	# Use dictionary key access instead of attribute to avoid conflict with dict.items() method
@@ -234,23 +387,20 @@ def _parse_request_data(kwargs):
 	elif isinstance(items, str):
 		# Items came as JSON string
 		try:
-			data["items"] = json.loads(items)
+			data["items"] = json_loads(items)
 		except json.JSONDecodeError:
 			frappe.throw(_("Invalid items data format. Expected JSON array."))
 	elif isinstance(items, (list, tuple)):
-		# Items came as a list/tuple - ensure each item is a dict
-		parsed_items = []
-		for item in items:
+		# Items came as a list/tuple - decode JSON string entries in place, without copying the list
+		# Anything that is still not a dict is reported by _validate_required_fields
+		if isinstance(items, tuple):
+			items = data["items"] = list(items)
+		for idx, item in enumerate(items):
 			if isinstance(item, str):
 				try:
-					parsed_items.append(json.loads(item))
+					items[idx] = json_loads(item)
 				except json.JSONDecodeError:
-					parsed_items.append(item)
-			elif isinstance(item, dict):
-				parsed_items.append(item)
-			else:
-				parsed_items.append(item)
-		data["items"] = parsed_items
+					pass
 	elif isinstance(items, dict):
 		# Single item passed as dict - convert to list
 		data["items"] = [items]
@@ -258,7 +408,7 @@ def _parse_request_data(kwargs):
 	# Handle additional_fields parsing
 	if isinstance(data.get("additional_fields"), str):
 		try:
-			data.additional_fields = json.loads(data.additional_fields)
+			data.additional_fields = json_loads(data.additional_fields)
 		except json.JSONDecodeError:
 			frappe.throw(_("Invalid additional_fields data format. Expected JSON object."))
 
@@ -289,32 +439,36 @@ def _validate_required_fields(data):
 	if not isinstance(invoice_items, list) or len(invoice_items) == 0:
 		frappe.throw(_("Items must be a non-empty list"))
 
+	# Stop at the first invalid item
+	error = next(_get_item_errors(invoice_items), None)
+	if error:
+		frappe.throw(error)
+
+
+def _get_item_errors(invoice_items):
+	"""Lazily yield a validation message for each invalid invoice item"""
 	for idx, item in enumerate(invoice_items, 1):
 		if not isinstance(item, dict):
-			frappe.throw(_("Item {0} must be a dictionary").format(idx))
-
-		if not item.get("item_code"):
-			frappe.throw(_("Item {0}: 'item_code' is required").format(idx))
+			yield _("Item {0} must be a dictionary").format(idx)
+		elif not item.get("item_code"):
+			yield _("Item {0}: 'item_code' is required").format(idx)
+		elif not item.get("qty"):
+			yield _("Item {0}: 'qty' is required").format(idx)
 
-		if not item.get("qty"):
-			frappe.throw(_("Item {0}: 'qty' is required").format(idx))
 
+def _get_or_create_customer(data, summary):
+	"""Get existing customer or create new one with address and custom fields
 
-def _get_or_create_customer(data):
-	"""Get existing customer or create new one with address and custom fields"""
+	Records customer_created / address_created in summary.
+	"""
 	customer_name = data.customer_name
 	company = data.company
 
 	# Search for existing customer by name
-	existing_customer = frappe.db.get_value(
-		"Customer",
-		{"customer_name": customer_name},
-		["name", "customer_name"],
-		as_dict=True
-	)
+	existing_customer = frappe.db.get_value("Customer", {"customer_name": customer_name}, "name")
 
 	if existing_customer:
-		return existing_customer.name
+		return existing_customer
 
 	# Create new customer
 	try:
@@ -334,22 +488,21 @@ def _get_or_create_customer(data):
 			customer_doc.custom_vat_registration_number = data.get("custom_vat_registration_number")
 
 		# Add Commercial Registration Number to custom_additional_ids child table if provided
-		if data.get("commercial_registration_number"):
-			# Check if custom_additional_ids field exists
-			if customer_doc.meta.has_field("custom_additional_ids"):
-				customer_doc.append("custom_additional_ids", {
-					"type_name": "Commercial Registration Number",
-					"type_code": "CRN",
-					"value": data.get("commercial_registration_number")
-				})
+		if data.get("commercial_registration_number") and "custom_additional_ids" in _get_fieldnames("Customer"):
+			customer_doc.append("custom_additional_ids", {
+				"type_name": "Commercial Registration Number",
+				"type_code": "CRN",
+				"value": data.get("commercial_registration_number")
+			})
 
 		customer_doc.insert(ignore_permissions=False)
+		summary["customer_created"] = True
 
 		# Create address if address fields are provided
 		if data.get("address_line1") or data.get("city"):
-			_create_customer_address(customer_doc.name, data)
+			summary["address_created"] = bool(_create_customer_address(customer_doc.name, data))
 
-		frappe.msgprint(
+		_msgprint(
 			_("New customer '{0}' created successfully").format(customer_name),
 			indicator="green",
 			alert=True
@@ -375,7 +528,7 @@ def _create_customer_address(customer, data):
 
 		# Check if address already exists
 		if frappe.db.exists("Address", {"address_title": address_title}):
-			frappe.msgprint(
+			_msgprint(
 				_("Address already exists for customer {0}").format(customer),
 				indicator="orange"
 			)
@@ -398,13 +551,10 @@ def _create_customer_address(customer, data):
 		})
 
 		# Add custom fields if they exist in Address doctype
-		if data.get("custom_building_number"):
-			if address.meta.has_field("custom_building_number"):
-				address.custom_building_number = data.get("custom_building_number")
-
-		if data.get("custom_area"):
-			if address.meta.has_field("custom_area"):
-				address.custom_area = data.get("custom_area")
+		address_fields = _get_fieldnames("Address")
+		for field in ("custom_building_number", "custom_area"):
+			if data.get(field) and field in address_fields:
+				address.set(field, data.get(field))
 
 		# Link address to customer
 		address.append("links", {
@@ -414,7 +564,7 @@ def _create_customer_address(customer, data):
 
 		address.insert(ignore_permissions=False)
 
-		frappe.msgprint(
+		_msgprint(
 			_("Address created for customer {0}").format(customer),
 			indicator="green",
 			alert=True
@@ -424,11 +574,11 @@ def _create_customer_address(customer, data):
 
 	except Exception as e:
 		# Log error but don't fail the customer creation
-		frappe.log_error(
+		_log_error(
 			message=f"Failed to create address for customer {customer}: {str(e)}",
 			title="Customer Address Creation Failed"
 		)
-		frappe.msgprint(
+		_msgprint(
 			_("Customer created but address creation failed: {0}").format(str(e)),
 			indicator="orange",
 			alert=True
@@ -457,7 +607,7 @@ def _add_invoice_taxes(invoice, data):
 			_apply_tax_template_to_invoice(invoice, template)
 			return
 		else:
-			frappe.log_error(
+			_log_error(
 				message=f"No tax template found for tax_id={tax_id}, company={company}",
 				title="Tax Template Not Found"
 			)
@@ -502,8 +652,7 @@ def _add_invoice_taxes(invoice, data):
 		"name"
 	)
 	if default_template:
-		template = frappe.get_doc("Sales Taxes and Charges Template", default_template)
-		_apply_tax_template_to_invoice(invoice, template)
+		_apply_tax_template_to_invoice(invoice, default_template)
 		return
 
 	# Option 5: Try ANY tax template for this company
@@ -513,8 +662,7 @@ def _add_invoice_taxes(invoice, data):
 		"name"
 	)
 	if any_template:
-		template = frappe.get_doc("Sales Taxes and Charges Template", any_template)
-		_apply_tax_template_to_invoice(invoice, template)
+		_apply_tax_template_to_invoice(invoice, any_template)
 		frappe.msgprint(
 			_("Using tax template '{0}' as fallback.").format(any_template),
 			indicator="blue"
@@ -522,7 +670,7 @@ def _add_invoice_taxes(invoice, data):
 
 
 def _get_tax_template_by_id(tax_id, company):
-	"""Get tax template by simple tax_id
+	"""Get tax template name by simple tax_id
 
 	Tax ID mapping:
 	- 1 = 15% VAT (Standard Rate)
@@ -558,30 +706,40 @@ def _get_tax_template_by_id(tax_id, company):
 		template_name_lower = template.name.lower()
 		for pattern in search_patterns:
 			if pattern in template_name_lower:
-				return frappe.get_doc("Sales Taxes and Charges Template", template.name)
+				return template.name
 
 	# Strategy 2: Find by tax rate in template
-	for template in templates:
-		template_doc = frappe.get_doc("Sales Taxes and Charges Template", template.name)
-		for tax_row in template_doc.taxes:
-			if flt(tax_row.rate) == target_rate:
-				return template_doc
+	if templates:
+		template_rates = {}
+		for row in frappe.get_all(
+			"Sales Taxes and Charges",
+			filters={
+				"parenttype": "Sales Taxes and Charges Template",
+				"parent": ("in", [t.name for t in templates])
+			},
+			fields=["parent", "rate"]
+		):
+			template_rates.setdefault(row.parent, []).append(flt(row.rate))
+
+		for template in templates:
+			if target_rate in template_rates.get(template.name, ()):
+				return template.name
 
 	return None
 
 
 def _find_tax_template(template_name, company):
-	"""Find tax template by name, trying various patterns"""
+	"""Find tax template name by name, trying various patterns"""
 	# Try exact match
 	if frappe.db.exists("Sales Taxes and Charges Template", template_name):
-		return frappe.get_doc("Sales Taxes and Charges Template", template_name)
+		return template_name
 
 	# Try with company abbreviation
-	company_abbr = frappe.get_cached_value("Company", company, "abbr")
+	company_abbr = _get_company_info(company).abbr
 	if company_abbr:
 		template_with_abbr = f"{template_name} - {company_abbr}"
 		if frappe.db.exists("Sales Taxes and Charges Template", template_with_abbr):
-			return frappe.get_doc("Sales Taxes and Charges Template", template_with_abbr)
+			return template_with_abbr
 
 	# Try partial match
 	templates = frappe.get_all(
@@ -593,39 +751,36 @@ def _find_tax_template(template_name, company):
 	template_name_lower = template_name.lower()
 	for template in templates:
 		if template_name_lower in template.name.lower():
-			return frappe.get_doc("Sales Taxes and Charges Template", template.name)
+			return template.name
 
 	return None
 
 
-def _apply_tax_template_to_invoice(invoice, template):
-	"""Apply a Sales Taxes and Charges Template to the invoice"""
-	invoice.taxes_and_charges = template.name
-	for tax in template.taxes:
-		invoice.append("taxes", {
-			"charge_type": tax.charge_type,
-			"account_head": tax.account_head,
-			"rate": tax.rate,
-			"description": tax.description,
-			"included_in_print_rate": tax.included_in_print_rate,
-			"cost_center": tax.cost_center
-		})
+def _apply_tax_template_to_invoice(invoice, template_name):
+	"""Apply a Sales Taxes and Charges Template to the invoice
 
+	Only the template's tax rows are read, the template document itself is not loaded.
+	"""
+	invoice.taxes_and_charges = template_name
+	for tax in _get_tax_template_rows(template_name):
+		# Copy, since the cached rows are shared for the rest of the request
+		invoice.append("taxes", dict(tax))
+
+
+@request_cache
+def _get_tax_template_rows(template_name):
+	"""Get the tax rows of a Sales Taxes and Charges Template (cached for the current request)"""
+	return tuple(frappe.get_all(
+		"Sales Taxes and Charges",
+		filters={"parent": template_name, "parenttype": "Sales Taxes and Charges Template"},
+		fields=["charge_type", "account_head", "rate", "description", "included_in_print_rate", "cost_center"],
+		order_by="idx"
+	))
 
-def _create_invoice(data, customer):
-	"""Create the sales invoice document"""
-	try:
-		invoice = frappe.get_doc({
-			"doctype": "Sales Invoice",
-			"company": data.company,
-			"customer": customer,
-			"posting_date": data.get("posting_date", nowdate()),
-			"due_date": data.get("due_date"),
-			"currency": data.get("currency") or frappe.get_cached_value("Company", data.company, "default_currency"),
-			"items": [],
-			"taxes": []
-		})
 
+def _create_invoice(data, customer, summary):
+	"""Create the sales invoice document, recording auto-created items in summary"""
+	try:
 		# Store custom invoice number for later renaming
 		custom_invoice_number = None
 		if data.get("invoice_number"):
@@ -638,18 +793,35 @@ def _create_invoice(data, customer):
 					frappe.DuplicateEntryError
 				)
 
-		# Add items - pass tax_id from invoice level to apply Item Tax Template
+		# Build item rows - pass tax_id from invoice level to apply Item Tax Template
 		invoice_tax_id = data.get("tax_id")
-		for item_data in data.get("items"):
-			_add_invoice_item(invoice, item_data, data.company, invoice_tax_id)
+		existing_items = _get_existing_items(data.get("items"))
+		summary["items_auto_created"] = _auto_create_missing_items(data.get("items"), data.company, existing_items)
+		invoice_items = [
+			_build_invoice_item_dict(item_data, data.company, existing_items, invoice_tax_id)
+			for item_data in data.get("items")
+		]
+
+		# Create the invoice with all item rows in a single pass
+		invoice = frappe.get_doc({
+			"doctype": "Sales Invoice",
+			"company": data.company,
+			"customer": customer,
+			"posting_date": data.get("posting_date", nowdate()),
+			"due_date": data.get("due_date"),
+			"currency": data.get("currency") or _get_company_info(data.company).default_currency,
+			"items": invoice_items,
+			"taxes": []
+		})
 
 		# Add taxes - either from template or custom taxes array
 		_add_invoice_taxes(invoice, data)
 
 		# Add additional custom fields
 		if data.get("additional_fields"):
+			invoice_fields = _get_fieldnames("Sales Invoice")
 			for field, value in data.get("additional_fields").items():
-				if invoice.meta.has_field(field):
+				if field in invoice_fields:
 					invoice.set(field, value)
 
 		# Insert and submit if requested
@@ -670,7 +842,7 @@ def _create_invoice(data, customer):
 				invoice.submit()
 			except Exception as submit_error:
 				# If submission fails, return the draft invoice with submission error details
-				frappe.log_error(
+				_log_error(
 					message=f"Invoice {invoice.name} created but submission failed: {str(submit_error)}\n{frappe.get_traceback()}",
 					title="Invoice Submission Failed"
 				)
@@ -703,18 +875,21 @@ def _create_invoice(data, customer):
 			)
 
 
-def _auto_create_item(item_code, item_data, company):
+def _auto_create_item(item_code, item_data, company, valid_item_groups, valid_tax_templates):
 	"""Automatically create an item if it doesn't exist
 
 	ZATCA requires item names to be at least 3 characters.
 	Priority for item_name: item_name > description > item_code
+
+	valid_item_groups and valid_tax_templates are the prefetched sets of existing
+	Item Group and Item Tax Template names (see _auto_create_missing_items).
 	"""
 	try:
 		# Determine item group
 		item_group = item_data.get("item_group", "Products")
 
 		# Verify item group exists
-		if not frappe.db.exists("Item Group", item_group):
+		if item_group not in valid_item_groups:
 			item_group = "All Item Groups"
 
 		# Determine item name - ZATCA requires minimum 3 characters
@@ -743,7 +918,7 @@ def _auto_create_item(item_code, item_data, company):
 
 		# Add item tax template if provided
 		if item_data.get("item_tax_template"):
-			if frappe.db.exists("Item Tax Template", item_data.get("item_tax_template")):
+			if item_data.get("item_tax_template") in valid_tax_templates:
 				item.append("taxes", {
 					"item_tax_template": item_data.get("item_tax_template"),
 					"tax_category": item_data.get("tax_category")
@@ -763,7 +938,7 @@ def _auto_create_item(item_code, item_data, company):
 		return item
 
 	except Exception as e:
-		frappe.log_error(
+		_log_error(
 			message=f"Failed to auto-create item {item_code}: {str(e)}\n{frappe.get_traceback()}",
 			title="Item Auto-Creation Failed"
 		)
@@ -774,29 +949,132 @@ def _auto_create_item(item_code, item_data, company):
 		)
 
 
-def _add_invoice_item(invoice, item_data, company, invoice_tax_id=None):
-	"""Add an item to the invoice
+def _get_existing_items(items):
+	"""Fetch the invoice items that already exist in a single query, keyed by item code
+
+	Codes are paired with the returned rows case-insensitively, as text and ignoring
+	surrounding spaces. If the database matched a row that this pairing misses (its
+	collation can differ in other details), the remaining codes are looked up again
+	with the database's own comparison. Each matching line's item_code is rewritten
+	to the stored Item name.
+	"""
+	fields = ["name", "item_name", "description", "stock_uom"]
+	item_codes = list({cstr(item.get("item_code")) for item in items})
+
+	found = {
+		_item_key(item.name): item
+		for item in frappe.get_all("Item", filters={"name": ("in", item_codes)}, fields=fields)
+	}
+
+	existing_items = {}
+	unmatched = []
+	for item_data in items:
+		item = found.get(_item_key(item_data.get("item_code")))
+		if item:
+			item_data["item_code"] = item.name
+			existing_items[item.name] = item
+		else:
+			unmatched.append(item_data)
+
+	if unmatched and len(existing_items) < len(found):
+		lookups = {}
+		for item_data in unmatched:
+			item_code = cstr(item_data.get("item_code"))
+			if item_code not in lookups:
+				lookups[item_code] = frappe.db.get_value("Item", item_code, fields, as_dict=True)
+
+			item = lookups[item_code]
+			if item:
+				item_data["item_code"] = item.name
+				existing_items[item.name] = item
+
+	return existing_items
+
+
+def _item_key(item_code):
+	"""Normalise an item code for matching: as text, case-insensitive, without surrounding spaces
+
+	Item codes are stripped when an Item is saved, so this also pairs up lines that
+	will create the same new item.
+	"""
+	return cstr(item_code).strip().casefold()
+
+
+def _auto_create_missing_items(items, company, existing_items):
+	"""Create every item that doesn't exist yet in a single pass before the lines are added
+
+	Each new item code is created once, using the first line that references it
+	(codes differing only in case count as the same item). Created items are added
+	to existing_items and every line's item_code is set to the created Item name.
+
+	Returns:
+		List of created item codes
+	"""
+	missing_items = [item_data for item_data in items if item_data.get("item_code") not in existing_items]
+	if not missing_items:
+		return []
+
+	# Validate item groups and tax templates of all new items in one query per doctype
+	valid_item_groups = _get_existing_names(
+		"Item Group", {item_data.get("item_group", "Products") for item_data in missing_items}
+	)
+	valid_tax_templates = _get_existing_names(
+		"Item Tax Template", {item_data.get("item_tax_template") for item_data in missing_items}
+	)
+
+	created_items = []
+	created_by_key = {}
+
+	for item_data in missing_items:
+		item_code = cstr(item_data.get("item_code"))
+		item = created_by_key.get(_item_key(item_code))
+
+		if not item:
+			item = _auto_create_item(item_code, item_data, company, valid_item_groups, valid_tax_templates)
+			created_by_key[_item_key(item_code)] = item
+			# Keep only the fields the invoice lines need, like the prefetched rows
+			existing_items[item.name] = frappe._dict(
+				name=item.name,
+				item_name=item.item_name,
+				description=item.description,
+				stock_uom=item.stock_uom
+			)
+			created_items.append(item.name)
+
+		item_data["item_code"] = item.name
+
+	if created_items:
+		_msgprint(
+			_("Created {0} item(s) automatically: {1}").format(len(created_items), ", ".join(created_items)),
+			indicator="green"
+		)
+
+	return created_items
+
+
+def _get_existing_names(doctype, names):
+	"""Return the subset of names that exist for the doctype, using a single query"""
+	names = [name for name in names if name]
+	if not names:
+		return set()
+
+	return set(frappe.get_all(doctype, filters={"name": ("in", names)}, pluck="name"))
+
+
+def _build_invoice_item_dict(item_data, company, existing_items, invoice_tax_id=None):
+	"""Build a Sales Invoice Item row for the invoice
 
 	Args:
-		invoice: Sales Invoice document
 		item_data: Item data dictionary
 		company: Company name
+		existing_items: Item details keyed by item code, including auto-created items
 		invoice_tax_id: Tax ID from invoice level (1=15%, 2=0%) to apply Item Tax Template
+
+	Returns:
+		Item row dictionary
 	"""
 	item_code = item_data.get("item_code")
-
-	# Check if item exists, if not create it
-	if not frappe.db.exists("Item", item_code):
-		# Auto-create the item
-		item = _auto_create_item(item_code, item_data, company)
-		frappe.msgprint(
-			_("Item '{0}' created automatically").format(item_code),
-			indicator="green",
-			alert=True
-		)
-	else:
-		# Get existing item details
-		item = frappe.get_cached_doc("Item", item_code)
+	item = existing_items[item_code]
 
 	# Determine rate
 	rate = flt(item_data.get("rate"))
@@ -823,7 +1101,7 @@ def _add_invoice_item(invoice, item_data, company, invoice_tax_id=None):
 	if item_tax_template:
 		item_row["item_tax_template"] = item_tax_template
 
-	invoice.append("items", item_row)
+	return item_row
 
 
 def _resolve_item_tax_template(item_data, company, invoice_tax_id=None):
@@ -849,7 +1127,7 @@ def _resolve_item_tax_template(item_data, company, invoice_tax_id=None):
 		if frappe.db.exists("Item Tax Template", template_name):
 			return template_name
 		# Try with company abbreviation
-		company_abbr = frappe.get_cached_value("Company", company, "abbr")
+		company_abbr = _get_company_info(company).abbr
 		if company_abbr:
 			template_with_company = f"{template_name} - {company_abbr}"
 			if frappe.db.exists("Item Tax Template", template_with_company):
@@ -867,6 +1145,7 @@ def _resolve_item_tax_template(item_data, company, invoice_tax_id=None):
 	return None
 
 
+@request_cache
 def _get_item_tax_template_by_tax_id(tax_id, company):
 	"""Get Item Tax Template by invoice-level tax_id
 
@@ -879,7 +1158,7 @@ def _get_item_tax_template_by_tax_id(tax_id, company):
 		company: Company name
 
 	Returns:
-		Item Tax Template name or None
+		Item Tax Template name or None (cached for the current request)
 	"""
 	tax_id = str(tax_id).strip()
 
@@ -893,42 +1172,27 @@ def _get_item_tax_template_by_tax_id(tax_id, company):
 	if target_rate is None:
 		return None
 
-	# Search patterns based on rate
-	if target_rate == 15:
-		search_patterns = ["vat 15", "15%", "15 -", "standard"]
-	else:
-		search_patterns = ["vat 0", "0%", "0 -", "zero"]
+	# Search patterns based on rate - same as the simple "1" / "2" tax codes
+	search_pattern = TAX_CODE_PATTERNS[tax_id]
 
 	# Get all Item Tax Templates for this company
-	templates = frappe.get_all(
-		"Item Tax Template",
-		filters={"company": company},
-		fields=["name"]
-	)
-
-	# Strategy 1: Find by name pattern
-	for template in templates:
-		template_name_lower = template.name.lower()
-		for pattern in search_patterns:
-			if pattern in template_name_lower:
-				return template.name
+	templates = frappe.get_all("Item Tax Template", filters={"company": company}, pluck="name")
 
-	# Strategy 2: Find by tax rate in template
-	for template in templates:
-		template_doc = frappe.get_cached_doc("Item Tax Template", template.name)
-		for tax_row in template_doc.taxes:
-			if flt(tax_row.tax_rate) == target_rate:
-				return template.name
+	# Strategy 1 & 2: Find by name pattern, else by tax rate in template
+	template_name = _match_item_tax_template(templates, search_pattern, target_rate)
+	if template_name:
+		return template_name
 
 	# Log if not found
-	frappe.log_error(
-		message=f"No Item Tax Template found for tax_id={tax_id} (rate={target_rate}%), company={company}. Available templates: {[t.name for t in templates]}",
+	_log_error(
+		message=f"No Item Tax Template found for tax_id={tax_id} (rate={target_rate}%), company={company}. Available templates: {templates}",
 		title="Item Tax Template Not Found"
 	)
 
 	return None
 
 
+@request_cache
 def _get_item_tax_template_from_code(tax_code, company):
 	"""Map ZATCA tax category code to Item Tax Template
 
@@ -938,55 +1202,24 @@ def _get_item_tax_template_from_code(tax_code, company):
 	- E / 03 = Exempt
 	- O / 04 = Out of Scope
 
-	Returns the Item Tax Template name for the company
+	Returns the Item Tax Template name for the company.
+	Cached for the current request since invoice lines usually share a tax code.
 	"""
 	# Normalize tax code
 	tax_code = str(tax_code).upper().strip()
 
-	# Map tax codes to search patterns and rates
-	tax_code_mapping = {
-		# Standard Rate 15%
-		"S": {"patterns": ["vat 15", "15%", "15 -", "standard"], "rate": 15},
-		"01": {"patterns": ["vat 15", "15%", "15 -", "standard"], "rate": 15},
-		"05": {"patterns": ["vat 15", "15%", "15 -", "standard"], "rate": 15},
-		"1": {"patterns": ["vat 15", "15%", "15 -", "standard"], "rate": 15},  # Simple format
-		# Zero Rated 0%
-		"Z": {"patterns": ["vat 0", "0%", "0 -", "zero"], "rate": 0},
-		"02": {"patterns": ["vat 0", "0%", "0 -", "zero"], "rate": 0},
-		"2": {"patterns": ["vat 0", "0%", "0 -", "zero"], "rate": 0},  # Simple format
-		# Exempt
-		"E": {"patterns": ["exempt", "0"], "rate": 0},
-		"03": {"patterns": ["exempt", "0"], "rate": 0},
-		# Out of Scope
-		"O": {"patterns": ["out of scope", "oos", "0"], "rate": 0},
-		"04": {"patterns": ["out of scope", "oos", "0"], "rate": 0},
-	}
-
-	mapping = tax_code_mapping.get(tax_code)
+	mapping = TAX_CODE_MAPPING.get(tax_code)
 	if not mapping:
 		return None
 
-	company_abbr = frappe.get_cached_value("Company", company, "abbr")
+	company_abbr = _get_company_info(company).abbr
 
-	# Strategy 1: Find template by pattern match for this company
-	templates = frappe.get_all(
-		"Item Tax Template",
-		filters={"company": company},
-		fields=["name"]
-	)
+	# Strategy 1 & 2: Find template by pattern match for this company, else by tax rate
+	templates = frappe.get_all("Item Tax Template", filters={"company": company}, pluck="name")
 
-	for template in templates:
-		template_name_lower = template.name.lower()
-		for pattern in mapping["patterns"]:
-			if pattern in template_name_lower:
-				return template.name
-
-	# Strategy 2: Find by tax rate in template
-	for template in templates:
-		template_doc = frappe.get_cached_doc("Item Tax Template", template.name)
-		for tax_row in template_doc.taxes:
-			if flt(tax_row.tax_rate) == mapping["rate"]:
-				return template.name
+	template_name = _match_item_tax_template(templates, TAX_CODE_PATTERNS[tax_code], mapping["rate"])
+	if template_name:
+		return template_name
 
 	# Strategy 3: Try common naming conventions
 	common_names = []
@@ -1005,28 +1238,98 @@ def _get_item_tax_template_from_code(tax_code, company):
 			f"Exempt - {company_abbr}",
 		]
 
-	for name in common_names:
-		if frappe.db.exists("Item Tax Template", name):
-			return name
+	if common_names:
+		existing_names = set(
+			frappe.get_all("Item Tax Template", filters={"name": ("in", common_names)}, pluck="name")
+		)
+		for name in common_names:
+			if name in existing_names:
+				return name
 
 	return None
 
 
+def _match_item_tax_template(templates, search_pattern, rate):
+	"""Pick an Item Tax Template by name pattern, falling back to tax rate, in one pass
+
+	A template whose lowercased name matches the pattern is returned immediately.
+	Otherwise the first template with a tax row at the given rate is returned.
+
+	Args:
+		templates: Item Tax Template names, in priority order
+		search_pattern: Compiled regex to search for in the lowercased template name (see TAX_CODE_PATTERNS)
+		rate: Tax rate to match against the template's tax rows
+
+	Returns:
+		Item Tax Template name or None
+	"""
+	template_rates = _get_item_tax_template_rates(templates)
+	rate_match = None
+
+	for template_name in templates:
+		template_name_lower = template_name.lower()
+		if search_pattern.search(template_name_lower):
+			return template_name
+
+		if rate_match is None and rate in template_rates.get(template_name, ()):
+			rate_match = template_name
+
+	return rate_match
+
+
+def _get_item_tax_template_rates(template_names):
+	"""Get the tax rates of each Item Tax Template with a single child table query
+
+	Returns:
+		Dictionary of template name to list of tax rates
+	"""
+	template_rates = {}
+	if not template_names:
+		return template_rates
+
+	for row in frappe.get_all(
+		"Item Tax Template Detail",
+		filters={"parenttype": "Item Tax Template", "parent": ("in", template_names)},
+		fields=["parent", "tax_rate"]
+	):
+		template_rates.setdefault(row.parent, []).append(flt(row.tax_rate))
+
+	return template_rates
+
+
+@request_cache
+def _get_fieldnames(doctype):
+	"""Get the set of fieldnames defined on a doctype, including custom fields (cached for the current request)"""
+	return frozenset(df.fieldname for df in frappe.get_meta(doctype).fields)
+
+
+@request_cache
+def _get_company_info(company):
+	"""Get the company fields used while building an invoice (cached for the current request)"""
+	return frappe.get_cached_value("Company", company, ["default_currency", "abbr"], as_dict=True) or frappe._dict()
+
+
+@request_cache
 def _get_default_warehouse(company):
-	"""Get default warehouse for the company"""
-	warehouse = frappe.db.get_value(
-		"Warehouse",
-		{"company": company, "is_group": 0},
-		"name"
+	"""Get default warehouse for the company (cached for the current request)"""
+	warehouse = frappe.qb.DocType("Warehouse")
+	result = (
+		frappe.qb.from_(warehouse)
+		.select(warehouse.name)
+		.where((warehouse.company == company) & (warehouse.is_group == 0))
+		# Same pick as frappe.db.get_value, which orders by modified desc
+		.orderby(warehouse.modified, order=Order.desc)
+		.limit(1)
+		.run()
 	)
-	return warehouse
+	return result[0][0] if result else None
 
 
 def _update_qr_code(invoice_name, qr_code_data):
 	"""Update QR code field in Sales Invoice"""
 	try:
-		# Check if custom field exists
-		if not frappe.db.exists("Custom Field", {"dt": "Sales Invoice", "fieldname": "qr_code"}):
+		# Check if the field exists (uses the cached DocType meta)
+		if not frappe.get_meta("Sales Invoice").has_field("qr_code"):
 			frappe.msgprint(
 				_("QR Code field does not exist in Sales Invoice. Please create it first."),
 				indicator="orange",
@@ -1034,11 +1337,10 @@ def _update_qr_code(invoice_name, qr_code_data):
 			)
 			return
 
-		frappe.db.set_value("Sales Invoice", invoice_name, "qr_code", qr_code_data)
-		frappe.msgprint(_("QR Code updated successfully"), indicator="green")
+		frappe.db.set_value("Sales Invoice", invoice_name, "qr_code", qr_code_data, update_modified=False)
 
 	except Exception as e:
-		frappe.log_error(
+		_log_error(
 			message=f"Failed to update QR code for {invoice_name}: {str(e)}",
 			title="QR Code Update Failed"
 		)
@@ -1092,7 +1394,7 @@ def _get_error_details(exception):
 	return error_details
 
 
-@frappe.whitelist(allow_guest=False)
+@frappe.whitelist(allow_guest=False, methods=["POST"])
 def update_invoice_qr_code(invoice_name, qr_code):
 	"""
 	Update QR code for an existing Sales Invoice
@@ -1106,8 +1408,6 @@ def update_invoice_qr_code(invoice_name, qr_code):
 	- message: Success or error message
 	"""
 	try:
-		_validate_api_auth()
-
 		if not invoice_name:
 			return _error_response(_("Invoice name is required"))
 
@@ -1118,7 +1418,6 @@ def update_invoice_qr_code(invoice_name, qr_code):
 			return _error_response(_("Sales Invoice '{0}' does not exist").format(invoice_name))
 
 		_update_qr_code(invoice_name, qr_code)
-		frappe.db.commit()
 
 		return {
 			"success": True,
@@ -1128,6 +1427,9 @@ def update_invoice_qr_code(invoice_name, qr_code):
 	except Exception as e:
 		frappe.db.rollback()
 		return _error_response(_("Failed to update QR code: {0}").format(str(e)))
+	finally:
+		# Written after any rollback above, so failure diagnostics are kept
+		_flush_error_logs()
 
 
 @frappe.whitelist(allow_guest=False)
@@ -1147,8 +1449,6 @@ def get_invoice_qr_code(invoice_name):
 	- invoice_name: Invoice name
 	"""
 	try:
-		_validate_api_auth()
-
 		if not invoice_name:
 			return _error_response(_("Invoice name is required"))
 
@@ -5,7 +5,29 @@ Run this script to test the API endpoints
 
 import requests
 import json
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+	# orjson serializes/parses several times faster and works in bytes directly
+	from orjson import OPT_INDENT_2
+	from orjson import dumps as json_dumps
+	from orjson import loads as json_loads
+
+	def _format_json(obj):
+		return json_dumps(obj, option=OPT_INDENT_2).decode()
+except ImportError:
+	from json import loads as json_loads
+
+	def json_dumps(obj):
+		return json.dumps(obj).encode()
+
+	def _format_json(obj):
+		return json.dumps(obj, indent=2)
 
 
 class SalesInvoiceAPIClient:
@@ -23,34 +45,151 @@ class SalesInvoiceAPIClient:
 		self.site_url = site_url.rstrip('/')
 		self.api_key = api_key
 		self.api_secret = api_secret
+
+		# Endpoint URLs are built once here instead of on every call
+		base_url = f"{self.site_url}/api/method/frappe_dotnet.api.sales_invoice."
+		self._url_create_sales_invoice = base_url + "create_sales_invoice"
+		self._url_create_sales_invoices_bulk = base_url + "create_sales_invoices_bulk"
+		self._url_update_invoice_qr_code = base_url + "update_invoice_qr_code"
+
 		self.headers = {
 			'Authorization': f'token {api_key}:{api_secret}',
 			'Content-Type': 'application/json'
 		}
 
-	def create_invoice(self, invoice_data: Dict[str, Any]) -> Dict[str, Any]:
+		# Reuse one keep-alive connection pool for all calls instead of a new
+		# TCP/TLS connection per request. Only idempotent methods are retried.
+		self.session = requests.Session()
+		self.session.headers.update(self.headers)
+		adapter = HTTPAdapter(
+			pool_connections=1,
+			pool_maxsize=20,
+			max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+		)
+		self.session.mount('https://', adapter)
+		self.session.mount('http://', adapter)
+
+	def close(self):
+		"""Close the underlying HTTP session"""
+		self.session.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+	def _request(
+		self,
+		method: str,
+		url: str,
+		action: str,
+		payload: dict[str, Any] | None = None,
+		params: dict[str, Any] | None = None,
+		body: bytes | None = None
+	) -> dict[str, Any]:
 		"""
-		Create a new Sales Invoice
+		Call an API method and return the response message
 
 		Args:
-			invoice_data: Dictionary containing invoice details
+			method: HTTP method (GET or POST)
+			url: Endpoint URL
+			action: What the call does, used in the error output (e.g. "creating item")
+			payload: Optional request body, sent as JSON
+			params: Optional query string parameters
+			body: Optional request body that is already JSON-encoded, sent as-is instead of payload
 
 		Returns:
-			API response as dictionary
+			API response as dictionary. On HTTP errors this is the server's error
+			response when it is JSON, otherwise a success=False dictionary.
 		"""
-		url = f"{self.site_url}/api/method/frappe_dotnet.api.sales_invoice.create_sales_invoice"
+		if body is None and payload is not None:
+			body = json_dumps(payload)
 
 		try:
-			response = requests.post(url, json=invoice_data, headers=self.headers)
+			response = self.session.request(method, url, data=body, params=params)
 			response.raise_for_status()
-			return response.json().get('message', {})
+			result = json_loads(response.content)
 		except requests.exceptions.RequestException as e:
-			print(f"Error creating invoice: {e}")
-			if hasattr(e, 'response') and e.response is not None:
-				return e.response.json()
+			print(f"Error {action}: {e}")
+			if e.response is not None:
+				try:
+					return json_loads(e.response.content)
+				except ValueError:
+					pass
 			return {"success": False, "message": str(e)}
+		except ValueError:
+			# e.g. an HTML login or proxy page served with HTTP 200
+			message = f"Invalid JSON response (HTTP {response.status_code})"
+			print(f"Error {action}: {message}")
+			return {"success": False, "message": message}
+
+		if not isinstance(result, dict):
+			message = "Unexpected response format"
+			print(f"Error {action}: {message}")
+			return {"success": False, "message": message}
+
+		return result.get('message', {})
+
+	def create_invoice(self, invoice_data: dict[str, Any]) -> dict[str, Any]:
+		"""
+		Create a new Sales Invoice
+
+		Args:
+			invoice_data: Dictionary containing invoice details
+
+		Returns:
+			API response as dictionary
+		"""
+		return self._request('POST', self._url_create_sales_invoice, "creating invoice", payload=invoice_data)
+
+	def create_invoice_raw(self, body: bytes) -> dict[str, Any]:
+		"""
+		Create a new Sales Invoice from an already JSON-encoded body
+
+		Args:
+			body: Invoice details serialized as JSON bytes
+
+		Returns:
+			API response as dictionary
+		"""
+		return self._request('POST', self._url_create_sales_invoice, "creating invoice", body=body)
+
+	def create_invoices(self, invoices: list[dict[str, Any]], max_workers: int = 10) -> list[dict[str, Any]]:
+		"""
+		Create several Sales Invoices concurrently
+
+		Args:
+			invoices: List of invoice data dictionaries
+			max_workers: Maximum number of requests in flight (keep within the session pool size)
+
+		Returns:
+			API responses, in the same order as invoices
+		"""
+		with ThreadPoolExecutor(max_workers=max_workers) as executor:
+			return list(executor.map(self.create_invoice, invoices))
+
+	def create_invoices_bulk(self, invoices: list[dict[str, Any]]) -> list[dict[str, Any]]:
+		"""
+		Create several Sales Invoices in a single request
+
+		All invoices go to the server in one call and are created all-or-nothing:
+		if one fails, none of them are created.
+
+		Args:
+			invoices: List of invoice data dictionaries
+
+		Returns:
+			API responses, in the same order as invoices
+		"""
+		response = self._request(
+			'POST', self._url_create_sales_invoices_bulk, "creating invoices", payload={"invoices": invoices}
+		)
+
+		# A request that failed as a whole has no per-invoice results
+		return response.get('results') or [response] * len(invoices)
 
-	def update_qr_code(self, invoice_name: str, qr_code: str) -> Dict[str, Any]:
+	def update_qr_code(self, invoice_name: str, qr_code: str) -> dict[str, Any]:
 		"""
 		Update QR code for an existing invoice
 
@@ -61,82 +200,94 @@ class SalesInvoiceAPIClient:
 		Returns:
 			API response as dictionary
 		"""
-		url = f"{self.site_url}/api/method/frappe_dotnet.api.sales_invoice.update_invoice_qr_code"
-
 		data = {
 			"invoice_name": invoice_name,
 			"qr_code": qr_code
 		}
 
-		try:
-			response = requests.post(url, json=data, headers=self.headers)
-			response.raise_for_status()
-			return response.json().get('message', {})
-		except requests.exceptions.RequestException as e:
-			print(f"Error updating QR code: {e}")
-			if hasattr(e, 'response') and e.response is not None:
-				return e.response.json()
-			return {"success": False, "message": str(e)}
+		return self._request('POST', self._url_update_invoice_qr_code, "updating QR code", payload=data)
 
 
-def test_basic_invoice():
-	"""Test creating a basic invoice"""
-	# Load configuration
-	with open('example_config.json', 'r') as f:
-		config = json.load(f)
+CONFIG_PATH = Path('example_config.json')
+
+
+@lru_cache(maxsize=1)
+def _read_config(mtime_ns: int) -> dict[str, Any]:
+	"""Parse the config file, cached per modification time"""
+	return json_loads(CONFIG_PATH.read_bytes())
+
+
+def _get_invoice_client() -> SalesInvoiceAPIClient:
+	"""Return the client shared across the tests, rebuilt after example_config.json changes"""
+	return _build_invoice_client(CONFIG_PATH.stat().st_mtime_ns)
 
-	# Initialize client
-	client = SalesInvoiceAPIClient(
+
+@lru_cache(maxsize=1)
+def _build_invoice_client(mtime_ns: int) -> SalesInvoiceAPIClient:
+	"""Build a client from the config, cached per modification time"""
+	config = _read_config(mtime_ns)
+
+	return SalesInvoiceAPIClient(
 		site_url=config['site_url'],
 		api_key=config['api_key'],
 		api_secret=config['api_secret']
 	)
 
-	# Invoice data with complete customer and address details
-	invoice_data = {
-		"company": "Company A",  # Update with your company name
-		"customer_name": "Test Customer Ltd",
-		"customer_email": "test@example.com",
-		"customer_phone": "+966501234567",
-		"customer_type": "Company",
-		"customer_group": "Commercial",
-		"territory": "All Territories",
-		# Customer ZATCA fields
-		"custom_vat_registration_number": "312038504300003",
-		"commercial_registration_number": "1010394694",
-		# Address details
-		"address_line1": "King Fahd Road",
-		"address_line2": "Building 123, Floor 4",
-		"custom_building_number": "7890",
-		"custom_area": "Al Olaya District",
-		"city": "Riyadh",
-		"state": "Riyadh Region",
-		"pincode": "12345",
-		"country": "Saudi Arabia",
-		# Invoice items
-		"items": [
-			{
-				"item_code": "ITEM-001",  # Update with your item code
-				"qty": 10,
-				"rate": 100.00,
-				"description": "Test Item 1"
-			},
-			{
-				"item_code": "ITEM-002",  # Update with your item code
-				"qty": 5,
-				"rate": 50.00,
-				"discount_percentage": 10
-			}
-		],
-		"qr_code": "ARVNVNLlE5BSkQgVFJBREVRyRBFU1QCD..."
-	}
+
+# Static request bodies, serialized once at import and sent as-is by the tests.
+# Update the values here; anything that must change per call (e.g. a unique code)
+# belongs in a dict passed to the regular create methods instead.
+
+# Invoice data with complete customer and address details
+_BASIC_INVOICE_BODY = json_dumps({
+	"company": "Company A",  # Update with your company name
+	"customer_name": "Test Customer Ltd",
+	"customer_email": "test@example.com",
+	"customer_phone": "+966501234567",
+	"customer_type": "Company",
+	"customer_group": "Commercial",
+	"territory": "All Territories",
+	# Customer ZATCA fields
+	"custom_vat_registration_number": "312038504300003",
+	"commercial_registration_number": "1010394694",
+	# Address details
+	"address_line1": "King Fahd Road",
+	"address_line2": "Building 123, Floor 4",
+	"custom_building_number": "7890",
+	"custom_area": "Al Olaya District",
+	"city": "Riyadh",
+	"state": "Riyadh Region",
+	"pincode": "12345",
+	"country": "Saudi Arabia",
+	# Invoice items
+	"items": [
+		{
+			"item_code": "ITEM-001",  # Update with your item code
+			"qty": 10,
+			"rate": 100.00,
+			"description": "Test Item 1"
+		},
+		{
+			"item_code": "ITEM-002",  # Update with your item code
+			"qty": 5,
+			"rate": 50.00,
+			"discount_percentage": 10
+		}
+	],
+	"qr_code": "ARVNVNLlE5BSkQgVFJBREVRyRBFU1QCD..."
+})
+
+
+def test_basic_invoice():
+	"""Test creating a basic invoice"""
+	client = _get_invoice_client()
 
 	# Create invoice
 	print("Creating invoice...")
-	result = client.create_invoice(invoice_data)
+	result = client.create_invoice_raw(_BASIC_INVOICE_BODY)
 
 	print("\nResponse:")
-	print(json.dumps(result, indent=2))
+	print(_format_json(result))
 
 	if result.get('success'):
 		print(f"\n✓ Invoice created successfully: {result.get('invoice_name')}")
@@ -150,16 +301,7 @@ def test_basic_invoice():
 
 def test_update_qr_code():
 	"""Test updating QR code for an existing invoice"""
-	# Load configuration
-	with open('example_config.json', 'r') as f:
-		config = json.load(f)
-
-	# Initialize client
-	client = SalesInvoiceAPIClient(
-		site_url=config['site_url'],
-		api_key=config['api_key'],
-		api_secret=config['api_secret']
-	)
+	client = _get_invoice_client()
 
 	# Update with an actual invoice name
 	invoice_name = "SINV-2025-00001"
@@ -169,7 +311,7 @@ def test_update_qr_code():
 	result = client.update_qr_code(invoice_name, qr_code)
 
 	print("\nResponse:")
-	print(json.dumps(result, indent=2))
+	print(_format_json(result))
 
 	if result.get('success'):
 		print(f"\n✓ QR code updated successfully")
@@ -179,40 +321,33 @@ def test_update_qr_code():
 
 def test_error_handling():
 	"""Test various error scenarios"""
-	# Load configuration
-	with open('example_config.json', 'r') as f:
-		config = json.load(f)
-
-	client = SalesInvoiceAPIClient(
-		site_url=config['site_url'],
-		api_key=config['api_key'],
-		api_secret=config['api_secret']
-	)
+	client = _get_invoice_client()
 
 	print("Testing error scenarios...\n")
 
-	# Test 1: Missing required fields
-	print("1. Testing missing required fields...")
-	result = client.create_invoice({"company": "Company A"})
-	print(f"   Result: {result.get('message')}\n")
-
-	# Test 2: Invalid company
-	print("2. Testing invalid company...")
-	result = client.create_invoice({
-		"company": "Non Existent Company",
-		"customer_name": "Test",
-		"items": [{"item_code": "ITEM-001", "qty": 1}]
-	})
-	print(f"   Result: {result.get('message')}\n")
-
-	# Test 3: Invalid item code
-	print("3. Testing invalid item code...")
-	result = client.create_invoice({
-		"company": "Company A",
-		"customer_name": "Test",
-		"items": [{"item_code": "INVALID-ITEM", "qty": 1}]
-	})
-	print(f"   Result: {result.get('message')}\n")
+	scenarios = [
+		# Test 1: Missing required fields
+		("Testing missing required fields...", {"company": "Company A"}),
+		# Test 2: Invalid company
+		("Testing invalid company...", {
+			"company": "Non Existent Company",
+			"customer_name": "Test",
+			"items": [{"item_code": "ITEM-001", "qty": 1}]
+		}),
+		# Test 3: Invalid item code
+		("Testing invalid item code...", {
+			"company": "Company A",
+			"customer_name": "Test",
+			"items": [{"item_code": "INVALID-ITEM", "qty": 1}]
+		}),
+	]
+
+	# The scenarios are independent, so send them concurrently
+	results = client.create_invoices([invoice_data for _, invoice_data in scenarios])
+
+	for idx, ((title, _), result) in enumerate(zip(scenarios, results, strict=True), 1):
+		print(f"{idx}. {title}")
+		print(f"   Result: {result.get('message')}\n")
 
 
 if __name__ == "__main__":
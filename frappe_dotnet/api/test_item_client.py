@@ -5,13 +5,54 @@ Run this script to test the Item API endpoints
 
 import requests
 import json
-from typing import Dict, Any
+import sys
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from typing import Any
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+	# orjson serializes/parses several times faster and works in bytes directly
+	from orjson import OPT_INDENT_2
+	from orjson import dumps as json_dumps
+	from orjson import loads as json_loads
+
+	def _format_json(obj):
+		return json_dumps(obj, option=OPT_INDENT_2).decode()
+except ImportError:
+	from json import loads as json_loads
+
+	def json_dumps(obj):
+		return json.dumps(obj).encode()
+
+	def _format_json(obj):
+		return json.dumps(obj, indent=2)
+
+try:
+	# Optional: lets large list responses be parsed incrementally
+	import ijson
+except ImportError:
+	ijson = None
+
+try:
+	# Optional: caches the reference-data GET endpoints between runs
+	from requests_cache import CachedSession
+except ImportError:
+	CachedSession = None
+
+
+class APIError(Exception):
+	"""Raised when the API answers with success: false, or with a body that isn't valid JSON"""
 
 
 class ItemAPIClient:
 	"""Client for interacting with the Item API"""
 
-	def __init__(self, site_url: str, api_key: str, api_secret: str):
+	def __init__(self, site_url: str, api_key: str, api_secret: str, cache_expire_after: int = 0):
 		"""
 		Initialize the API client
 
@@ -19,38 +60,184 @@ class ItemAPIClient:
 			site_url: ERPNext site URL (e.g., https://your-site.com)
 			api_key: API key from ERPNext user
 			api_secret: API secret from ERPNext user
+			cache_expire_after: Seconds to cache GET responses (default 0, no caching).
+				Requires requests-cache; responses are stored in item_api_cache.sqlite
+				in the current directory. Cached GETs are read in full, so
+				iter_item_groups no longer streams.
 		"""
 		self.site_url = site_url.rstrip('/')
 		self.api_key = api_key
 		self.api_secret = api_secret
+
+		# Endpoint URLs are built once here instead of on every call
+		base_url = f"{self.site_url}/api/method/frappe_dotnet.api.item."
+		self._url_create_item = base_url + "create_item"
+		self._url_create_items_bulk = base_url + "create_items_bulk"
+		self._url_get_tax_templates = base_url + "get_tax_templates"
+		self._url_get_tax_categories = base_url + "get_tax_categories"
+		self._url_get_item_groups = base_url + "get_item_groups"
+
 		self.headers = {
 			'Authorization': f'token {api_key}:{api_secret}',
 			'Content-Type': 'application/json'
 		}
 
-	def create_item(self, item_data: Dict[str, Any]) -> Dict[str, Any]:
+		# Reuse one keep-alive connection pool for all calls instead of a new
+		# TCP/TLS connection per request. Only idempotent methods are retried.
+		# Tax templates, tax categories and item groups change rarely, so GETs can
+		# optionally be served from a local cache. POSTs are never cached, and the
+		# cache key includes the Authorization header so users never share entries.
+		if cache_expire_after:
+			if CachedSession is None:
+				raise ImportError("cache_expire_after requires the requests-cache package")
+
+			self.session = CachedSession(
+				'item_api_cache',
+				backend='sqlite',
+				expire_after=cache_expire_after,
+				allowable_methods=('GET',),
+				match_headers=['Authorization']
+			)
+		else:
+			self.session = requests.Session()
+		self.session.headers.update(self.headers)
+		adapter = HTTPAdapter(
+			pool_connections=1,
+			pool_maxsize=20,
+			max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+		)
+		self.session.mount('https://', adapter)
+		self.session.mount('http://', adapter)
+
+	def close(self):
+		"""Close the underlying HTTP session"""
+		self.session.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+	def clear_cache(self):
+		"""Drop cached GET responses, e.g. after changing tax templates or item groups"""
+		if CachedSession is not None and isinstance(self.session, CachedSession):
+			self.session.cache.clear()
+
+	def _request(
+		self,
+		method: str,
+		url: str,
+		action: str,
+		payload: dict[str, Any] | None = None,
+		params: dict[str, Any] | None = None,
+		body: bytes | None = None
+	) -> dict[str, Any]:
 		"""
-		Create a new Item
+		Call an API method and return the response message
 
 		Args:
-			item_data: Dictionary containing item details
+			method: HTTP method (GET or POST)
+			url: Endpoint URL
+			action: What the call does, used in the error output (e.g. "creating item")
+			payload: Optional request body, sent as JSON
+			params: Optional query string parameters
+			body: Optional request body that is already JSON-encoded, sent as-is instead of payload
 
 		Returns:
-			API response as dictionary
+			API response as dictionary. On HTTP errors a POST returns the server's
+			error response when it is JSON; everything else returns a success=False
+			dictionary with the server's error message.
 		"""
-		url = f"{self.site_url}/api/method/frappe_dotnet.api.item.create_item"
+		if body is None and payload is not None:
+			body = json_dumps(payload)
 
 		try:
-			response = requests.post(url, json=item_data, headers=self.headers)
+			response = self.session.request(method, url, data=body, params=params)
 			response.raise_for_status()
-			return response.json().get('message', {})
+			result = json_loads(response.content)
 		except requests.exceptions.RequestException as e:
-			print(f"Error creating item: {e}")
-			if hasattr(e, 'response') and e.response is not None:
-				return e.response.json()
+			print(f"Error {action}: {e}")
+			if e.response is not None:
+				try:
+					error_body = json_loads(e.response.content)
+				except ValueError:
+					error_body = None
+				if isinstance(error_body, dict):
+					if method == 'POST':
+						return error_body
+					return {"success": False, "message": _get_server_message(error_body, str(e))}
 			return {"success": False, "message": str(e)}
+		except ValueError:
+			# e.g. an HTML login or proxy page served with HTTP 200
+			message = f"Invalid JSON response (HTTP {response.status_code})"
+			print(f"Error {action}: {message}")
+			return {"success": False, "message": message}
+
+		if not isinstance(result, dict):
+			message = "Unexpected response format"
+			print(f"Error {action}: {message}")
+			return {"success": False, "message": message}
+
+		return result.get('message', {})
+
+	def create_item(self, item_data: dict[str, Any]) -> dict[str, Any]:
+		"""
+		Create a new Item
+
+		Args:
+			item_data: Dictionary containing item details
+
+		Returns:
+			API response as dictionary
+		"""
+		return self._request('POST', self._url_create_item, "creating item", payload=item_data)
+
+	def create_item_raw(self, body: bytes) -> dict[str, Any]:
+		"""
+		Create a new Item from an already JSON-encoded body
+
+		Args:
+			body: Item details serialized as JSON bytes
+
+		Returns:
+			API response as dictionary
+		"""
+		return self._request('POST', self._url_create_item, "creating item", body=body)
+
+	def create_items(self, items: list[dict[str, Any]], max_workers: int = 10) -> list[dict[str, Any]]:
+		"""
+		Create several Items concurrently
+
+		Args:
+			items: List of item data dictionaries
+			max_workers: Maximum number of requests in flight (keep within the session pool size)
+
+		Returns:
+			API responses, in the same order as items
+		"""
+		with ThreadPoolExecutor(max_workers=max_workers) as executor:
+			return list(executor.map(self.create_item, items))
+
+	def create_items_bulk(self, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+		"""
+		Create several Items in a single request
+
+		All items go to the server in one call and are created all-or-nothing:
+		if one fails, none of them are created.
+
+		Args:
+			items: List of item data dictionaries
+
+		Returns:
+			API responses, in the same order as items
+		"""
+		response = self._request('POST', self._url_create_items_bulk, "creating items", payload={"items": items})
+
+		# A request that failed as a whole has no per-item results
+		return response.get('results') or [response] * len(items)
 
-	def get_tax_templates(self, company: str = None) -> Dict[str, Any]:
+	def get_tax_templates(self, company: str | None = None) -> dict[str, Any]:
 		"""
 		Get available tax templates
 
@@ -60,100 +247,224 @@ class ItemAPIClient:
 		Returns:
 			API response as dictionary
 		"""
-		url = f"{self.site_url}/api/method/frappe_dotnet.api.item.get_tax_templates"
-
 		params = {}
 		if company:
 			params["company"] = company
 
-		try:
-			response = requests.get(url, headers=self.headers, params=params)
-			response.raise_for_status()
-			return response.json().get('message', {})
-		except requests.exceptions.RequestException as e:
-			print(f"Error getting tax templates: {e}")
-			return {"success": False, "message": str(e)}
+		return self._request('GET', self._url_get_tax_templates, "getting tax templates", params=params)
 
-	def get_tax_categories(self) -> Dict[str, Any]:
+	def get_tax_categories(self) -> dict[str, Any]:
 		"""
 		Get available tax categories
 
 		Returns:
 			API response as dictionary
 		"""
-		url = f"{self.site_url}/api/method/frappe_dotnet.api.item.get_tax_categories"
+		return self._request('GET', self._url_get_tax_categories, "getting tax categories")
 
-		try:
-			response = requests.get(url, headers=self.headers)
-			response.raise_for_status()
-			return response.json().get('message', {})
-		except requests.exceptions.RequestException as e:
-			print(f"Error getting tax categories: {e}")
-			return {"success": False, "message": str(e)}
-
-	def get_item_groups(self) -> Dict[str, Any]:
+	def get_item_groups(self) -> dict[str, Any]:
 		"""
 		Get available item groups
 
 		Returns:
 			API response as dictionary
 		"""
-		url = f"{self.site_url}/api/method/frappe_dotnet.api.item.get_item_groups"
+		return self._request('GET', self._url_get_item_groups, "getting item groups")
 
-		try:
-			response = requests.get(url, headers=self.headers)
+	def iter_item_groups(self) -> Iterator[dict[str, Any]]:
+		"""
+		Yield available item groups one at a time
+
+		With ijson installed the response is parsed while it streams in, so stopping
+		early (e.g. with itertools.islice) skips parsing the rest and closes the
+		connection. Without ijson the full response is parsed first.
+
+		Raises:
+			requests.exceptions.RequestException on HTTP errors
+			APIError when the API reports a failure (HTTP 200 with success: false)
+		"""
+		with self.session.get(self._url_get_item_groups, stream=True) as response:
 			response.raise_for_status()
-			return response.json().get('message', {})
-		except requests.exceptions.RequestException as e:
-			print(f"Error getting item groups: {e}")
-			return {"success": False, "message": str(e)}
 
+			if ijson is None:
+				try:
+					message = json_loads(response.content).get('message', {})
+				except (ValueError, AttributeError):
+					raise APIError(f"Invalid JSON response (HTTP {response.status_code})")
 
-def test_get_configuration():
-	"""Test getting tax templates, categories, and item groups"""
-	# Load configuration
-	with open('example_config.json', 'r') as f:
-		config = json.load(f)
+				if not message.get('success'):
+					raise APIError(message.get('message') or "Failed to get item groups")
+
+				yield from message.get('item_groups', [])
+				return
+
+			response.raw.decode_content = True
+			try:
+				events = _check_success(ijson.parse(response.raw))
+				yield from ijson.items(events, 'message.item_groups.item')
+			except ijson.JSONError:
+				raise APIError(f"Invalid JSON response (HTTP {response.status_code})")
 
-	# Initialize client
-	client = ItemAPIClient(
+
+def _check_success(events: Iterator[tuple]) -> Iterator[tuple]:
+	"""Pass ijson parse events through, raising APIError once the message object ends with success: false"""
+	success = message = None
+
+	for prefix, event, value in events:
+		if prefix == 'message.success':
+			success = value
+		elif prefix == 'message.message':
+			message = value
+		elif prefix == 'message' and event == 'end_map' and not success:
+			raise APIError(message or "Failed to get item groups")
+
+		yield prefix, event, value
+
+
+def _get_server_message(error_body: dict[str, Any], default: str) -> str:
+	"""Extract a readable message from a Frappe error response (exc_type/exception/_server_messages)"""
+	server_messages = error_body.get('_server_messages')
+	if server_messages:
+		try:
+			messages = [json_loads(message).get('message', message) for message in json_loads(server_messages)]
+			return "; ".join(str(message) for message in messages)
+		except (ValueError, TypeError, AttributeError):
+			pass
+
+	return error_body.get('exception') or error_body.get('exc_type') or default
+
+
+def _print_names(title: str, names: Iterable[str], limit: int | None = None):
+	"""Print a title followed by one "   - name" line per name, in a single write"""
+	lines = [title, *(f"   - {name}" for name in islice(names, limit))]
+	sys.stdout.write("\n".join(lines) + "\n")
+
+
+CONFIG_PATH = Path('example_config.json')
+
+
+@lru_cache(maxsize=1)
+def _read_config(mtime_ns: int) -> dict[str, Any]:
+	"""Parse the config file, cached per modification time"""
+	return json_loads(CONFIG_PATH.read_bytes())
+
+
+def _load_config() -> dict[str, Any]:
+	"""Read example_config.json, parsing it again only after the file has changed"""
+	return _read_config(CONFIG_PATH.stat().st_mtime_ns)
+
+
+def _get_item_client() -> ItemAPIClient:
+	"""Return the client shared across the tests, rebuilt after example_config.json changes"""
+	return _build_item_client(CONFIG_PATH.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=1)
+def _build_item_client(mtime_ns: int) -> ItemAPIClient:
+	"""Build a client from the config, cached per modification time
+
+	Set "cache_expire_after" (seconds) in the config to cache the reference-data GETs.
+	"""
+	config = _read_config(mtime_ns)
+
+	cache_expire_after = config.get('cache_expire_after', 0)
+	if cache_expire_after and CachedSession is None:
+		print("requests-cache is not installed, GET responses will not be cached")
+		cache_expire_after = 0
+
+	return ItemAPIClient(
 		site_url=config['site_url'],
 		api_key=config['api_key'],
-		api_secret=config['api_secret']
+		api_secret=config['api_secret'],
+		cache_expire_after=cache_expire_after
 	)
 
+
+# Static request bodies, serialized once at import and sent as-is by the tests.
+# Update the values here; anything that must change per call (e.g. a unique code)
+# belongs in a dict passed to the regular create methods instead.
+
+# Basic item data
+_BASIC_ITEM_BODY = json_dumps({
+	"item_code": "TEST-BASIC-001",
+	"item_name": "Basic Test Product",
+	"item_group": "Products",  # Update with your item group
+	"description": "Basic test product created via API",
+	"stock_uom": "Nos",
+	"standard_rate": 100.00,
+	"is_stock_item": 1,
+	"maintain_stock": 1
+})
+
+# Item data with VAT
+_VAT_ITEM_BODY = json_dumps({
+	"item_code": "TEST-VAT-001",
+	"item_name": "VAT Test Product",
+	"item_group": "Products",  # Update with your item group
+	"description": "Product with VAT configuration",
+	"stock_uom": "Nos",
+	"standard_rate": 150.00,
+	"company": "ZATCA Company",  # Update with your company
+	"item_tax_template": "VAT 15 - GSS",  # Update with your tax template
+	"tax_category": "VAT-GSS",  # Update with your tax category
+	"default_warehouse": "Stores - ZATCA"  # Update with your warehouse
+})
+
+# Service item data
+_SERVICE_ITEM_BODY = json_dumps({
+	"item_code": "TEST-SERV-001",
+	"item_name": "Consulting Service",
+	"item_group": "Services",  # Update with your service group
+	"description": "Professional consulting service",
+	"stock_uom": "Hour",
+	"is_stock_item": 0,
+	"maintain_stock": 0,
+	"standard_rate": 500.00,
+	"company": "ZATCA Company",  # Update with your company
+	"item_tax_template": "VAT 15 - GSS",  # Update with your tax template
+	"tax_category": "VAT-GSS"  # Update with your tax category
+})
+
+
+def test_get_configuration():
+	"""Test getting tax templates, categories, and item groups"""
+	client = _get_item_client()
+
 	print("=" * 60)
 	print("GETTING CONFIGURATION DATA")
 	print("=" * 60)
 
 	# Get item groups
 	print("\n1. Getting Item Groups...")
-	groups = client.get_item_groups()
-	if groups.get('success'):
-		print(f"   Found {len(groups['item_groups'])} item groups:")
-		for group in groups['item_groups'][:5]:  # Show first 5
-			print(f"   - {group['name']}")
-	else:
-		print(f"   Error: {groups.get('message')}")
+	try:
+		# Only the first 5 are shown, so only the first 5 are parsed
+		groups = list(islice(client.iter_item_groups(), 5))
+		_print_names(f"   First {len(groups)} item groups:", (group['name'] for group in groups))
+	except (requests.exceptions.RequestException, APIError) as e:
+		groups = []
+		print(f"   Error: {e}")
 
 	# Get tax categories
 	print("\n2. Getting Tax Categories...")
 	categories = client.get_tax_categories()
 	if categories.get('success'):
-		print(f"   Found {len(categories['tax_categories'])} tax categories:")
-		for cat in categories['tax_categories']:
-			print(f"   - {cat['name']}")
+		_print_names(
+			f"   Found {len(categories['tax_categories'])} tax categories:",
+			(cat['name'] for cat in categories['tax_categories'])
+		)
 	else:
 		print(f"   Error: {categories.get('message')}")
 
 	# Get tax templates
 	print("\n3. Getting Tax Templates...")
+	config = _load_config()
 	company = config['companies'][0]['name'] if config.get('companies') else None
 	templates = client.get_tax_templates(company)
 	if templates.get('success'):
-		print(f"   Found {len(templates['tax_templates'])} tax templates:")
-		for template in templates['tax_templates']:
-			print(f"   - {template['name']} ({template.get('company', 'No Company')})")
+		_print_names(
+			f"   Found {len(templates['tax_templates'])} tax templates:",
+			(f"{template['name']} ({template.get('company', 'No Company')})" for template in templates['tax_templates'])
+		)
 	else:
 		print(f"   Error: {templates.get('message')}")
 
@@ -162,39 +473,18 @@ def test_get_configuration():
 
 def test_create_basic_item():
 	"""Test creating a basic item"""
-	# Load configuration
-	with open('example_config.json', 'r') as f:
-		config = json.load(f)
-
-	# Initialize client
-	client = ItemAPIClient(
-		site_url=config['site_url'],
-		api_key=config['api_key'],
-		api_secret=config['api_secret']
-	)
+	client = _get_item_client()
 
 	print("\n" + "=" * 60)
 	print("TEST 1: Creating Basic Item")
 	print("=" * 60)
 
-	# Item data
-	item_data = {
-		"item_code": "TEST-BASIC-001",
-		"item_name": "Basic Test Product",
-		"item_group": "Products",  # Update with your item group
-		"description": "Basic test product created via API",
-		"stock_uom": "Nos",
-		"standard_rate": 100.00,
-		"is_stock_item": 1,
-		"maintain_stock": 1
-	}
-
 	# Create item
 	print("\nCreating item...")
-	result = client.create_item(item_data)
+	result = client.create_item_raw(_BASIC_ITEM_BODY)
 
 	print("\nResponse:")
-	print(json.dumps(result, indent=2))
+	print(_format_json(result))
 
 	if result.get('success'):
 		print(f"\n✓ Item created successfully: {result.get('item_code')}")
@@ -207,41 +497,18 @@ def test_create_basic_item():
 
 def test_create_vat_item():
 	"""Test creating an item with VAT configuration"""
-	# Load configuration
-	with open('example_config.json', 'r') as f:
-		config = json.load(f)
-
-	# Initialize client
-	client = ItemAPIClient(
-		site_url=config['site_url'],
-		api_key=config['api_key'],
-		api_secret=config['api_secret']
-	)
+	client = _get_item_client()
 
 	print("\n" + "=" * 60)
 	print("TEST 2: Creating Item with VAT")
 	print("=" * 60)
 
-	# Item data with VAT
-	item_data = {
-		"item_code": "TEST-VAT-001",
-		"item_name": "VAT Test Product",
-		"item_group": "Products",  # Update with your item group
-		"description": "Product with VAT configuration",
-		"stock_uom": "Nos",
-		"standard_rate": 150.00,
-		"company": "ZATCA Company",  # Update with your company
-		"item_tax_template": "VAT 15 - GSS",  # Update with your tax template
-		"tax_category": "VAT-GSS",  # Update with your tax category
-		"default_warehouse": "Stores - ZATCA"  # Update with your warehouse
-	}
-
 	# Create item
 	print("\nCreating item with VAT configuration...")
-	result = client.create_item(item_data)
+	result = client.create_item_raw(_VAT_ITEM_BODY)
 
 	print("\nResponse:")
-	print(json.dumps(result, indent=2))
+	print(_format_json(result))
 
 	if result.get('success'):
 		print(f"\n✓ Item created successfully: {result.get('item_code')}")
@@ -254,42 +521,18 @@ def test_create_vat_item():
 
 def test_create_service_item():
 	"""Test creating a service (non-stock) item"""
-	# Load configuration
-	with open('example_config.json', 'r') as f:
-		config = json.load(f)
-
-	# Initialize client
-	client = ItemAPIClient(
-		site_url=config['site_url'],
-		api_key=config['api_key'],
-		api_secret=config['api_secret']
-	)
+	client = _get_item_client()
 
 	print("\n" + "=" * 60)
 	print("TEST 3: Creating Service Item (Non-Stock)")
 	print("=" * 60)
 
-	# Service item data
-	item_data = {
-		"item_code": "TEST-SERV-001",
-		"item_name": "Consulting Service",
-		"item_group": "Services",  # Update with your service group
-		"description": "Professional consulting service",
-		"stock_uom": "Hour",
-		"is_stock_item": 0,
-		"maintain_stock": 0,
-		"standard_rate": 500.00,
-		"company": "ZATCA Company",  # Update with your company
-		"item_tax_template": "VAT 15 - GSS",  # Update with your tax template
-		"tax_category": "VAT-GSS"  # Update with your tax category
-	}
-
 	# Create item
 	print("\nCreating service item...")
-	result = client.create_item(item_data)
+	result = client.create_item_raw(_SERVICE_ITEM_BODY)
 
 	print("\nResponse:")
-	print(json.dumps(result, indent=2))
+	print(_format_json(result))
 
 	if result.get('success'):
 		print(f"\n✓ Service item created successfully: {result.get('item_code')}")
@@ -300,18 +543,13 @@ def test_create_service_item():
 	return result
 
 
-def test_create_multi_company_item():
-	"""Test creating an item for multiple companies"""
-	# Load configuration
-	with open('example_config.json', 'r') as f:
-		config = json.load(f)
+def test_create_multi_company_item(items: list[dict[str, Any]] | None = None):
+	"""Test creating items for multiple companies
 
-	# Initialize client
-	client = ItemAPIClient(
-		site_url=config['site_url'],
-		api_key=config['api_key'],
-		api_secret=config['api_secret']
-	)
+	Args:
+		items: Item data dictionaries to create in one bulk request (defaults to a sample item)
+	"""
+	client = _get_item_client()
 
 	print("\n" + "=" * 60)
 	print("TEST 4: Creating Multi-Company Item")
@@ -349,20 +587,24 @@ def test_create_multi_company_item():
 		]
 	}
 
-	# Create item
-	print("\nCreating multi-company item...")
-	result = client.create_item(item_data)
+	if items is None:
+		items = [item_data]
+
+	# Create all items in a single request
+	print(f"\nCreating {len(items)} multi-company item(s)...")
+	results = client.create_items_bulk(items)
 
 	print("\nResponse:")
-	print(json.dumps(result, indent=2))
+	print(_format_json(results))
 
-	if result.get('success'):
-		print(f"\n✓ Multi-company item created successfully: {result.get('item_code')}")
-		print(f"  URL: {result.get('item_url')}")
-	else:
-		print(f"\n✗ Failed to create multi-company item: {result.get('message')}")
+	for result in results:
+		if result.get('success'):
+			print(f"\n✓ Multi-company item created successfully: {result.get('item_code')}")
+			print(f"  URL: {result.get('item_url')}")
+		else:
+			print(f"\n✗ Failed to create multi-company item: {result.get('message')}")
 
-	return result
+	return results
 
 
 if __name__ == "__main__":